@@ -1,18 +1,27 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr, validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, validator
+from typing import Dict, FrozenSet, List, Optional, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 from passlib.context import CryptContext
+from cachetools import LRUCache, TTLCache
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -22,21 +31,71 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    tz_aware=True,
+    maxPoolSize=200,
+    minPoolSize=20,
+    maxIdleTimeMS=60000,
+    serverSelectionTimeoutMS=3000,
+    uuidRepresentation="standard",
+)
 db = client[os.environ['DB_NAME']]
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; lower it (e.g. BCRYPT_ROUNDS=4) for test environments
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '10'))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Rate Limiter
-limiter = Limiter(key_func=get_remote_address)
+# Scopes granted to each role; unknown roles fall back to read-only
+ROLE_SCOPES: Dict[str, Tuple[str, ...]] = {
+    "admin": ("read", "write", "delete", "admin"),
+    "user": ("read", "write"),
+    "guest": ("read",),
+}
+
+# HS256 key and decoder built once; HMAC itself is OpenSSL-backed via hmac
+_SIGNING_KEY = SECRET_KEY.encode()
+_jwt_decoder = jwt.PyJWT(options={"require": ["exp", "sub"]})
+
+# Successful password verifications, keyed by sha256(password|hash). Only
+# matches are cached so the cache never answers for a wrong password.
+_verified_passwords = LRUCache(maxsize=4096)
+
+# bcrypt releases the GIL, so hashing on worker threads runs in parallel and
+# keeps the event loop free for other requests
+_HASH_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="password-hash")
+
+# Auth caches: decoded token claims keyed by raw bearer token, and loaded
+# users keyed by id. The TTL is kept well under the token lifetime so
+# changed users are not served for long; admin mutations evict explicitly.
+AUTH_CACHE_TTL_SECONDS = 30
+_token_cache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL_SECONDS)
+_user_cache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL_SECONDS)
+_user_locks: Dict[str, asyncio.Lock] = {}
+
+# Challenge header for 401s on bearer-authenticated routes. Errors are raised
+# as fresh HTTPException instances: a shared module-level instance would keep
+# its last traceback (and the request's frames, including the raw token)
+# reachable until the next raise.
+_BEARER_CHALLENGE = {"WWW-Authenticate": "Bearer"}
+
+# Rate Limiter. The default in-memory store is per process; point
+# RATE_LIMIT_STORAGE_URI at Redis (e.g. redis://localhost:6379) so limits
+# are shared across uvicorn workers.
+RATE_LIMIT_STORAGE_URI = os.environ.get('RATE_LIMIT_STORAGE_URI', 'memory://')
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI)
+
+# TEST_MODE=1 exposes routes that let the test suite reset server state.
+# Never enable it in production.
+TEST_MODE = os.environ.get('TEST_MODE') == '1'
 
 # Create the main app
-app = FastAPI(title="API Security Validation Framework")
+app = FastAPI(title="API Security Validation Framework", default_response_class=ORJSONResponse)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -45,6 +104,12 @@ api_router = APIRouter(prefix="/api")
 
 # ============ Models ============
 
+def _utc_now_ms() -> datetime:
+    """Current UTC time truncated to milliseconds, the precision BSON dates
+    keep, so a POST response matches what later reads return"""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
 class UserRole(BaseModel):
     """User roles and scopes"""
     role: str  # admin, user, guest
@@ -53,14 +118,19 @@ class UserRole(BaseModel):
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     email: EmailStr
     username: str
     hashed_password: str
     role: str = "user"  # admin, user, guest
     scopes: List[str] = ["read"]  # read, write, delete, admin
     is_active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=_utc_now_ms)
+
+    @cached_property
+    def scope_set(self) -> FrozenSet[str]:
+        """Scopes as a frozenset for O(1) permission checks"""
+        return frozenset(self.scopes)
 
 class UserRegister(BaseModel):
     email: EmailStr
@@ -95,12 +165,12 @@ class Token(BaseModel):
 class Product(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str
     price: float
     created_by: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=_utc_now_ms)
 
     @validator('price')
     def validate_price(cls, v):
@@ -108,6 +178,9 @@ class Product(BaseModel):
             raise ValueError('Price must be positive')
         return v
 
+# Serializes product lists exactly like the response_model=Product routes
+_PRODUCT_LIST = TypeAdapter(List[Product])
+
 class ProductCreate(BaseModel):
     name: str
     description: str
@@ -121,11 +194,27 @@ class ProductCreate(BaseModel):
 
 # ============ Security Helpers ============
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def _password_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    return hashlib.sha256(plain_password.encode() + b"|" + hashed_password.encode()).digest()
+
+def _remember_verified(key: bytes, hashed_password: str, verified: bool):
+    if verified and not pwd_context.needs_update(hashed_password):
+        _verified_passwords[key] = True
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_HASH_EXECUTOR, pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    # The cache is only touched on the event loop; just bcrypt runs on a worker
+    key = _password_cache_key(plain_password, hashed_password)
+    if key in _verified_passwords:
+        return True
+    
+    loop = asyncio.get_running_loop()
+    verified = await loop.run_in_executor(_HASH_EXECUTOR, pwd_context.verify, plain_password, hashed_password)
+    _remember_verified(key, hashed_password, verified)
+    return verified
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -134,44 +223,78 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SIGNING_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+def _decode_token(token: str) -> str:
+    """Verify a bearer token and return its subject, caching the claims per token"""
+    entry = _token_cache.get(token)
+    if entry is not None:
+        user_id, expires_at = entry
+        if expires_at > time.time():
+            return user_id
+        _token_cache.pop(token, None)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        payload = _jwt_decoder.decode(token, _SIGNING_KEY, algorithms=[ALGORITHM])
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    except (InvalidTokenError, Exception):
+            headers=_BEARER_CHALLENGE,
+        ) from None
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
-    return User(**user)
+            headers=_BEARER_CHALLENGE,
+        ) from None
+
+    _token_cache[token] = (payload["sub"], payload["exp"])
+    return payload["sub"]
+
+async def _load_user(user_id: str) -> User:
+    """Load a user by id, caching the result for AUTH_CACHE_TTL_SECONDS"""
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    # Serialize misses per user so a burst of requests queries Mongo once
+    lock = _user_locks.setdefault(user_id, asyncio.Lock())
+    try:
+        async with lock:
+            user = _user_cache.get(user_id)
+            if user is not None:
+                return user
+
+            user_data = await db.users.find_one({"id": user_id}, {"_id": 0, "hashed_password": 0})
+            if user_data is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+
+            # Documents are written by this service, so skip re-validation
+            user = User.model_construct(**user_data)
+            _user_cache[user_id] = user
+            return user
+    finally:
+        _user_locks.pop(user_id, None)
+
+def invalidate_cached_user(user_id: str):
+    """Evict a user from the auth cache after it is changed or deleted"""
+    _user_cache.pop(user_id, None)
+
+async def _decode_and_load_user(token: str) -> User:
+    """Decode a bearer token and load its user"""
+    return await _load_user(_decode_token(token))
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await _decode_and_load_user(credentials.credentials)
 
 def require_scope(required_scope: str):
     async def scope_checker(current_user: User = Depends(get_current_user)):
-        if required_scope not in current_user.scopes:
+        if required_scope not in current_user.scope_set:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Insufficient permissions. Required scope: {required_scope}"
@@ -194,34 +317,27 @@ def require_role(required_role: str):
 @api_router.post("/auth/register", response_model=dict, status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/minute")
 async def register(request: Request, user_data: UserRegister):
-    # Check if user exists
-    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 0})
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Set scopes based on role
-    scopes = ["read"]
-    if user_data.role == "admin":
-        scopes = ["read", "write", "delete", "admin"]
-    elif user_data.role == "user":
-        scopes = ["read", "write"]
+    scopes = list(ROLE_SCOPES.get(user_data.role, ROLE_SCOPES["guest"]))
     
     # Create user
     user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         role=user_data.role,
         scopes=scopes
     )
     
-    # Save to database
+    # Save to database; the unique email index rejects duplicates atomically
     user_dict = user.model_dump()
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
-    await db.users.insert_one(user_dict)
+    try:
+        await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        ) from None
     
     return {"message": "User created successfully", "user_id": user.id}
 
@@ -239,7 +355,7 @@ async def login(request: Request, credentials: UserLogin):
     user = User(**user_data)
     
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -270,7 +386,7 @@ async def root(request: Request):
 
 @api_router.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
+    return {"status": "healthy", "timestamp": datetime.now(timezone.utc)}
 
 # ============ Protected Routes (Authentication Required) ============
 
@@ -287,16 +403,14 @@ async def get_current_user_info(request: Request, current_user: User = Depends(g
 
 # ============ Protected Routes (Read Scope) ============
 
-@api_router.get("/products", response_model=List[Product])
+@api_router.get("/products")
 @limiter.limit("30/minute")
 async def get_products(request: Request, current_user: User = Depends(require_scope("read"))):
     products = await db.products.find({}, {"_id": 0}).to_list(100)
-    
-    for product in products:
-        if isinstance(product.get('created_at'), str):
-            product['created_at'] = datetime.fromisoformat(product['created_at'])
-    
-    return products
+    # One pydantic pass straight to JSON bytes: same shape and datetime
+    # format as the single-product routes, without the response_model detour
+    body = _PRODUCT_LIST.dump_json(_PRODUCT_LIST.validate_python(products))
+    return Response(content=body, media_type="application/json")
 
 @api_router.get("/products/{product_id}", response_model=Product)
 @limiter.limit("30/minute")
@@ -308,9 +422,6 @@ async def get_product(request: Request, product_id: str, current_user: User = De
             detail="Product not found"
         )
     
-    if isinstance(product.get('created_at'), str):
-        product['created_at'] = datetime.fromisoformat(product['created_at'])
-    
     return Product(**product)
 
 # ============ Protected Routes (Write Scope) ============
@@ -330,7 +441,6 @@ async def create_product(
     )
     
     product_dict = product.model_dump()
-    product_dict['created_at'] = product_dict['created_at'].isoformat()
     await db.products.insert_one(product_dict)
     
     return product
@@ -357,11 +467,10 @@ async def update_product(
         description=product_data.description,
         price=product_data.price,
         created_by=existing_product['created_by'],
-        created_at=datetime.fromisoformat(existing_product['created_at']) if isinstance(existing_product['created_at'], str) else existing_product['created_at']
+        created_at=existing_product['created_at']
     )
     
     product_dict = updated_product.model_dump()
-    product_dict['created_at'] = product_dict['created_at'].isoformat()
     
     await db.products.update_one({"id": product_id}, {"$set": product_dict})
     
@@ -386,11 +495,11 @@ async def delete_product(
 
 # ============ Admin Only Routes ============
 
-@api_router.get("/admin/users", response_model=List[dict])
+@api_router.get("/admin/users")
 @limiter.limit("20/minute")
 async def get_all_users(request: Request, current_user: User = Depends(require_role("admin"))):
     users = await db.users.find({}, {"_id": 0, "hashed_password": 0}).to_list(100)
-    return users
+    return ORJSONResponse(users)
 
 @api_router.delete("/admin/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 @limiter.limit("5/minute")
@@ -405,6 +514,7 @@ async def delete_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    invalidate_cached_user(user_id)
     return None
 
 @api_router.post("/admin/elevate/{user_id}", response_model=dict)
@@ -414,20 +524,29 @@ async def elevate_user_to_admin(
     user_id: str,
     current_user: User = Depends(require_scope("admin"))
 ):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if not user:
+    user = await db.users.find_one_and_update(
+        {"id": user_id},
+        {"$set": {"role": "admin", "scopes": list(ROLE_SCOPES["admin"])}},
+        projection={"_id": 0, "id": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
-    await db.users.update_one(
-        {"id": user_id},
-        {"$set": {"role": "admin", "scopes": ["read", "write", "delete", "admin"]}}
-    )
+    invalidate_cached_user(user_id)
     
     return {"message": "User elevated to admin", "user_id": user_id}
 
+# ============ Test Support Routes (TEST_MODE only) ============
+
+if TEST_MODE:
+    @api_router.post("/test/reset-rate-limits", status_code=status.HTTP_204_NO_CONTENT)
+    async def reset_rate_limits():
+        limiter.reset()
+        return None
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -446,6 +565,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    # Open the pool before the first request so it doesn't pay the handshake
+    await client.admin.command("ping")
+    await db.users.create_index("id", unique=True)
+    await db.users.create_index("email", unique=True)
+    await db.products.create_index("id", unique=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
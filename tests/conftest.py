@@ -1,140 +1,333 @@
 """Pytest configuration and fixtures"""
 import pytest
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import queue
+import itertools
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
 import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+from tests.helpers import HTTP_POOL_SIZE
 
 # Base URL for API
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8001/api")
 
+# Seconds the session-start health probe waits for the API
+HEALTH_PROBE_TIMEOUT = 2.0
+
+# Markers whose tests share one xdist worker (pytest.ini sets --dist=loadgroup)
+XDIST_GROUP_MARKERS = ("rate_limit", "db_mutate")
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--mock-api",
+        action="store_true",
+        default=False,
+        help="Answer requests from canned responses and skip tests marked live"
+    )
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="Also run tests marked slow"
+    )
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """Pin grouped tests to one xdist worker per marker, skip live-server
+    tests under --mock-api and slow tests without --run-slow. Runs first so
+    the xdist_group markers exist before xdist folds them into the nodeids"""
+    mock_api = config.getoption("--mock-api")
+    run_slow = config.getoption("--run-slow")
+    skip_live = pytest.mark.skip(reason="needs a live API server (--mock-api)")
+    skip_slow = pytest.mark.skip(reason="slow test (use --run-slow)")
+    for item in items:
+        for marker in XDIST_GROUP_MARKERS:
+            if item.get_closest_marker(marker):
+                item.add_marker(pytest.mark.xdist_group(marker))
+                break
+        # Registered users only exist on a real server
+        if mock_api and (item.get_closest_marker("live") or "user_pool" in item.fixturenames):
+            item.add_marker(skip_live)
+        if not run_slow and item.get_closest_marker("slow"):
+            item.add_marker(skip_slow)
+
+# Groups each worker ran (on workers) and the workers that ran each group
+# (on the xdist controller), checked when the session finishes
+_groups_run = set()
+_group_workers = defaultdict(set)
+
+def pytest_runtest_protocol(item, nextitem):
+    """Record the xdist group of every test, including skipped ones"""
+    for marker in item.iter_markers(name="xdist_group"):
+        _groups_run.add(marker.args[0])
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect the groups a finished worker ran"""
+    for group in getattr(node, "workeroutput", {}).get("xdist_groups", []):
+        _group_workers[group].add(node.gateway.id)
+
+def pytest_sessionfinish(session):
+    """Report the groups this worker ran, and on the controller fail the run
+    if any grouped tests were split across workers"""
+    if hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["xdist_groups"] = sorted(_groups_run)
+        return
+    split = {group: sorted(workers) for group, workers in _group_workers.items() if len(workers) > 1}
+    if split:
+        reporter = session.config.pluginmanager.get_plugin("terminalreporter")
+        if reporter is not None:
+            reporter.write_line(f"xdist groups split across workers: {split}", red=True)
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+@pytest.fixture(scope="session")
+def mock_api(request):
+    """Whether requests are answered by the canned-response transport"""
+    return request.config.getoption("--mock-api")
+
 @pytest.fixture(scope="session")
-def api_base_url():
+def api_base_url(mock_api):
     """Base URL for the API"""
+    if mock_api:
+        from tests.pages.mock_api import MOCK_BASE_URL
+        return MOCK_BASE_URL
     return BASE_URL
 
+@pytest.fixture(scope="session")
+def http_session(mock_api):
+    """HTTP session shared by all page objects for connection reuse"""
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    })
+    # Enough pooled connections for concurrent fixture setup and bursts
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if mock_api:
+        from tests.pages.mock_api import MOCK_BASE_URL, MockAPIAdapter
+        session.mount(MOCK_BASE_URL, MockAPIAdapter())
+    yield session
+    session.close()
+
+@pytest.fixture(scope="session")
+def auth_api(api_base_url, http_session):
+    """Authentication page object shared by the session"""
+    from tests.pages.auth_api import AuthAPI
+    return AuthAPI(api_base_url, http_session)
+
+@pytest.fixture(scope="session")
+def protected_api(api_base_url, http_session):
+    """Protected endpoints page object shared by the session"""
+    from tests.pages.protected_api import ProtectedAPI
+    return ProtectedAPI(api_base_url, http_session)
+
+@pytest.fixture(scope="session", autouse=True)
+def _require_api(api_base_url, http_session, mock_api):
+    """Probe /health once (per xdist worker): opens the pooled connection
+    before the first test, and fails the run if the API is unreachable"""
+    if mock_api:
+        return
+    try:
+        http_session.get(f"{api_base_url}/health", timeout=HEALTH_PROBE_TIMEOUT).raise_for_status()
+    except requests.RequestException as exc:
+        # pytest caches the failure, so every test errors without re-probing
+        pytest.fail(f"API unreachable at {api_base_url}: {exc}", pytrace=False)
+
+# Username/email prefix and password used for each role's test accounts
+ROLE_PROFILES = {
+    "user": ("testuser", "testpass123"),
+    "admin": ("admin", "adminpass123"),
+    "guest": ("guest", "guestpass123"),
+}
+
+# Users pre-registered per role at session start. Registration is limited to
+# 5/minute, so earlier registrations can exhaust it; UserPool then clears the
+# limits on TEST_MODE servers and fails with a clear message on others
+USER_POOL_SIZE = int(os.getenv("USER_POOL_SIZE", "1"))
+
+# Unique per test process (and so per xdist worker); a counter makes each
+# generated account unique within the run without time-based collisions
+RUN_ID = uuid.uuid4().hex[:8]
+_credential_counter = itertools.count()
+
+def make_user_credentials(role: str) -> Dict:
+    """Build unique credentials for a user with the given role"""
+    prefix, password = ROLE_PROFILES[role]
+    unique_id = f"{RUN_ID}_{next(_credential_counter)}"
+    return {
+        "email": f"{prefix}_{unique_id}@example.com",
+        "username": f"{prefix}_{unique_id}",
+        "password": password,
+        "role": role
+    }
+
+class UserPool:
+    """Registered users handed out one per test, refilled on demand"""
+    
+    def __init__(self, auth_api, protected_api):
+        self.auth_api = auth_api
+        self.protected_api = protected_api
+        self._queues = {role: queue.Queue() for role in ROLE_PROFILES}
+    
+    def fill(self, counts: Dict[str, int]):
+        """Pre-register users concurrently; counts maps role to number of users"""
+        roles = [role for role, count in counts.items() for _ in range(count)]
+        if not roles:
+            return
+        with ThreadPoolExecutor(max_workers=len(roles)) as executor:
+            for role, user in zip(roles, executor.map(self._register, roles)):
+                self._queues[role].put(user)
+    
+    def acquire(self, role: str) -> Dict:
+        """Take an unused registered user, registering one if the pool is empty"""
+        try:
+            return self._queues[role].get_nowait()
+        except queue.Empty:
+            return self._register(role)
+    
+    def _register(self, role: str) -> Dict:
+        credentials = make_user_credentials(role)
+        
+        # Register user
+        register_response = self._register_response(credentials)
+        self.auth_api.assert_status_code(register_response, 201, f"Registering a {role} for the pool should succeed")
+        
+        # Login to get token
+        login_response = self.auth_api.login_response(
+            credentials["email"],
+            credentials["password"]
+        )
+        self.auth_api.assert_status_code(login_response, 200, f"Logging in a pooled {role} should succeed")
+        
+        return {
+            **credentials,
+            "token": login_response.json()["access_token"],
+            "user_id": register_response.json()["user_id"]
+        }
+    
+    def _register_response(self, credentials: Dict):
+        """Register, retrying once after clearing the rate limits if the
+        5/minute registration limit is exhausted"""
+        def send():
+            return self.auth_api.register_response(
+                credentials["email"],
+                credentials["username"],
+                credentials["password"],
+                credentials["role"]
+            )
+        
+        response = send()
+        if response.status_code != 429:
+            return response
+        if self.protected_api.reset_rate_limits().status_code == 204:
+            return send()
+        pytest.fail(
+            "Registering test users hit the 5/minute registration limit; start the "
+            "backend with TEST_MODE=1 or wait a minute and run again",
+            pytrace=False
+        )
+
+@pytest.fixture(scope="session")
+def unique_prefix(request):
+    """Prefix for ad-hoc emails, unique per run and xdist worker"""
+    worker_id = getattr(request.config, "workerinput", {}).get("workerid", "master")
+    return f"{worker_id}_{RUN_ID}"
+
 @pytest.fixture(scope="function")
 def test_user_credentials():
     """Test user credentials"""
-    import random
-    unique_id = f"{int(time.time())}{random.randint(1000, 9999)}"
-    return {
-        "email": f"testuser_{unique_id}@example.com",
-        "username": f"testuser_{unique_id}",
-        "password": "testpass123",
-        "role": "user"
-    }
+    return make_user_credentials("user")
 
 @pytest.fixture(scope="function")
 def admin_user_credentials():
     """Admin user credentials"""
-    import random
-    unique_id = f"{int(time.time())}{random.randint(1000, 9999)}"
-    return {
-        "email": f"admin_{unique_id}@example.com",
-        "username": f"admin_{unique_id}",
-        "password": "adminpass123",
-        "role": "admin"
-    }
+    return make_user_credentials("admin")
 
 @pytest.fixture(scope="function")
 def guest_user_credentials():
     """Guest user credentials"""
-    import random
-    unique_id = f"{int(time.time())}{random.randint(1000, 9999)}"
-    return {
-        "email": f"guest_{unique_id}@example.com",
-        "username": f"guest_{unique_id}",
-        "password": "guestpass123",
-        "role": "guest"
-    }
+    return make_user_credentials("guest")
 
-@pytest.fixture(scope="function")
-def registered_user(api_base_url, test_user_credentials):
-    """Register a test user and return credentials with token"""
-    from tests.pages.auth_api import AuthAPI
-    auth_api = AuthAPI(api_base_url)
-    
-    # Register user
-    register_response = auth_api.register(
-        test_user_credentials["email"],
-        test_user_credentials["username"],
-        test_user_credentials["password"],
-        test_user_credentials["role"]
-    )
-    
-    # Login to get token
-    login_response = auth_api.login(
-        test_user_credentials["email"],
-        test_user_credentials["password"]
-    )
-    
-    return {
-        **test_user_credentials,
-        "token": login_response["access_token"],
-        "user_id": register_response["user_id"]
-    }
+@pytest.fixture(scope="session")
+def user_pool(auth_api, protected_api):
+    """Pool of users registered once per session, one handed to each test"""
+    pool = UserPool(auth_api, protected_api)
+    pool.fill({role: USER_POOL_SIZE for role in ROLE_PROFILES})
+    return pool
 
-@pytest.fixture(scope="function")
-def registered_admin(api_base_url, admin_user_credentials):
-    """Register an admin user and return credentials with token"""
-    from tests.pages.auth_api import AuthAPI
-    auth_api = AuthAPI(api_base_url)
-    
-    # Register admin
-    register_response = auth_api.register(
-        admin_user_credentials["email"],
-        admin_user_credentials["username"],
-        admin_user_credentials["password"],
-        admin_user_credentials["role"]
-    )
-    
-    # Login to get token
-    login_response = auth_api.login(
-        admin_user_credentials["email"],
-        admin_user_credentials["password"]
-    )
-    
-    return {
-        **admin_user_credentials,
-        "token": login_response["access_token"],
-        "user_id": register_response["user_id"]
-    }
+@pytest.fixture(scope="session")
+def _all_registered_users(user_pool):
+    """Shared user, admin and guest, taken from the prefilled pool (user_pool
+    registers them concurrently)"""
+    return {role: user_pool.acquire(role) for role in ROLE_PROFILES}
+
+@pytest.fixture(scope="session")
+def registered_user(_all_registered_users):
+    """Registered user with token (shared by the session; do not delete or elevate)"""
+    return _all_registered_users["user"]
+
+@pytest.fixture(scope="session")
+def registered_admin(_all_registered_users):
+    """Registered admin with token (shared by the session; do not delete)"""
+    return _all_registered_users["admin"]
+
+@pytest.fixture(scope="session")
+def registered_guest(_all_registered_users):
+    """Registered guest with token (shared by the session; do not delete or elevate)"""
+    return _all_registered_users["guest"]
+
+@pytest.fixture(scope="session")
+def auth_token(registered_user):
+    """Bearer token of the shared registered user"""
+    return registered_user["token"]
+
+def _fetch_me(auth_api, user: Dict) -> MappingProxyType:
+    """GET /me for a registered user, failing on any non-200 status"""
+    response = auth_api.get_current_user(user["token"])
+    auth_api.assert_status_code(response, 200, "GET /me for the shared user should succeed")
+    return MappingProxyType(response.json())
+
+@pytest.fixture(scope="session")
+def user_me(auth_api, registered_user):
+    """GET /me body for the shared user, fetched once (read-only)"""
+    return _fetch_me(auth_api, registered_user)
+
+@pytest.fixture(scope="session")
+def admin_me(auth_api, registered_admin):
+    """GET /me body for the shared admin, fetched once (read-only)"""
+    return _fetch_me(auth_api, registered_admin)
+
+@pytest.fixture(scope="session")
+def guest_me(auth_api, registered_guest):
+    """GET /me body for the shared guest, fetched once (read-only)"""
+    return _fetch_me(auth_api, registered_guest)
 
 @pytest.fixture(scope="function")
-def registered_guest(api_base_url, guest_user_credentials):
-    """Register a guest user and return credentials with token"""
-    from tests.pages.auth_api import AuthAPI
-    auth_api = AuthAPI(api_base_url)
-    
-    # Register guest
-    register_response = auth_api.register(
-        guest_user_credentials["email"],
-        guest_user_credentials["username"],
-        guest_user_credentials["password"],
-        guest_user_credentials["role"]
-    )
-    
-    # Login to get token
-    login_response = auth_api.login(
-        guest_user_credentials["email"],
-        guest_user_credentials["password"]
-    )
-    
-    return {
-        **guest_user_credentials,
-        "token": login_response["access_token"],
-        "user_id": register_response["user_id"]
-    }
+def disposable_user(user_pool):
+    """Fresh registered user that a test may delete"""
+    return user_pool.acquire("user")
 
 @pytest.fixture(scope="function")
+def elevatable_user(user_pool):
+    """Fresh registered user that a test may elevate to admin"""
+    return user_pool.acquire("user")
+
+@pytest.fixture(scope="session")
 def test_product_data():
-    """Test product data"""
-    return {
+    """Test product data (read-only, shared by the session)"""
+    return MappingProxyType({
         "name": f"Test Product {int(time.time())}",
         "description": "This is a test product",
         "price": 99.99
-    }
+    })
 
 @pytest.fixture(scope="function")
 def cleanup_test_data(api_base_url):
@@ -144,4 +337,42 @@ def cleanup_test_data(api_base_url):
     yield created_products
     
     # Cleanup logic can be added here if needed
-    # Note: In a real scenario, you might want to clean up test data
\ No newline at end of file
+    # Note: In a real scenario, you might want to clean up test data
+
+@pytest.fixture(scope="session")
+def test_db(mock_api):
+    """Direct handle on the API database when MONGO_URL and DB_NAME are set"""
+    mongo_url = os.getenv("MONGO_URL")
+    db_name = os.getenv("DB_NAME")
+    if mock_api or not (mongo_url and db_name):
+        yield None
+        return
+    
+    from pymongo import MongoClient
+    client = MongoClient(mongo_url, tz_aware=True)
+    yield client[db_name]
+    client.close()
+
+@pytest.fixture(autouse=True)
+def _maybe_reset_db(request):
+    """Remove users and products created by the body of a needs_db test.
+    Only this run's accounts (emails carry RUN_ID) and their products are
+    touched, so other xdist workers and other people's data are left alone"""
+    if not request.node.get_closest_marker("needs_db"):
+        yield
+        return
+    
+    db = request.getfixturevalue("test_db")
+    # Set up the test's other fixtures first, so shared and pooled users
+    # registered for it predate the window and survive the cleanup
+    for name in request.fixturenames:
+        if name != "_maybe_reset_db":
+            request.getfixturevalue(name)
+    started_at = datetime.now(timezone.utc)
+    yield
+    if db is None:
+        return
+    run_users = {"email": {"$regex": f"_{RUN_ID}_"}}
+    run_user_ids = [user["id"] for user in db.users.find(run_users, {"_id": 0, "id": 1})]
+    db.products.delete_many({"created_at": {"$gte": started_at}, "created_by": {"$in": run_user_ids}})
+    db.users.delete_many({**run_users, "created_at": {"$gte": started_at}})
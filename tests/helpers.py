@@ -0,0 +1,14 @@
+"""Shared helpers for test modules"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, TypeVar
+
+T = TypeVar("T")
+
+# Connections kept per host by the shared HTTP session; bursts use as many
+# threads so every request gets a pooled connection
+HTTP_POOL_SIZE = 32
+
+def burst(send: Callable[[int], T], count: int) -> List[T]:
+    """Call send(i) for i in range(count) concurrently, results in call order"""
+    with ThreadPoolExecutor(max_workers=min(count, HTTP_POOL_SIZE)) as executor:
+        return list(executor.map(send, range(count)))
@@ -2,13 +2,42 @@
 import requests
 from typing import Dict, Optional, Any
 import json
+import orjson
+
+class CachedJSONResponse:
+    """Wraps a requests.Response so its JSON body is parsed once (with orjson)
+    and reused; every other attribute is read from the wrapped response"""
+    
+    def __init__(self, response: requests.Response):
+        self._response = response
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+    
+    def __bool__(self) -> bool:
+        return bool(self._response)
+    
+    def __repr__(self) -> str:
+        return repr(self._response)
+    
+    def json(self, **kwargs) -> Any:
+        if kwargs:
+            return self._response.json(**kwargs)
+        if "_json_cache" not in self.__dict__:
+            try:
+                self._json_cache = orjson.loads(self._response.content)
+            except orjson.JSONDecodeError as exc:
+                # Same exception type as requests.Response.json()
+                raise requests.exceptions.JSONDecodeError(exc.msg, exc.doc, exc.pos) from exc
+        return self._json_cache
 
 class BaseAPI:
     """Base class for all API page objects following POM pattern"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, session: Optional[requests.Session] = None):
         self.base_url = base_url
-        self.session = requests.Session()
+        # Share an injected session so connections are reused across page objects
+        self.session = session if session is not None else requests.Session()
         self.default_headers = {
             "Content-Type": "application/json",
             "Accept": "application/json"
@@ -26,60 +55,91 @@ class BaseAPI:
         
         return headers
     
-    def get(self, endpoint: str, token: Optional[str] = None, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> requests.Response:
+    def get(self, endpoint: str, token: Optional[str] = None, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> CachedJSONResponse:
         """Make GET request"""
         url = f"{self.base_url}{endpoint}"
         request_headers = self._get_headers(token, headers)
         response = self.session.get(url, headers=request_headers, params=params)
-        return response
+        return self._cache_json(response)
     
-    def post(self, endpoint: str, data: Optional[Dict] = None, token: Optional[str] = None, headers: Optional[Dict] = None) -> requests.Response:
+    def post(self, endpoint: str, data: Optional[Dict] = None, token: Optional[str] = None, headers: Optional[Dict] = None) -> CachedJSONResponse:
         """Make POST request"""
         url = f"{self.base_url}{endpoint}"
         request_headers = self._get_headers(token, headers)
-        response = self.session.post(url, json=data, headers=request_headers)
-        return response
+        response = self.session.post(url, data=self._encode(data), headers=request_headers)
+        return self._cache_json(response)
     
-    def put(self, endpoint: str, data: Optional[Dict] = None, token: Optional[str] = None, headers: Optional[Dict] = None) -> requests.Response:
+    def put(self, endpoint: str, data: Optional[Dict] = None, token: Optional[str] = None, headers: Optional[Dict] = None) -> CachedJSONResponse:
         """Make PUT request"""
         url = f"{self.base_url}{endpoint}"
         request_headers = self._get_headers(token, headers)
-        response = self.session.put(url, json=data, headers=request_headers)
-        return response
+        response = self.session.put(url, data=self._encode(data), headers=request_headers)
+        return self._cache_json(response)
     
-    def delete(self, endpoint: str, token: Optional[str] = None, headers: Optional[Dict] = None) -> requests.Response:
+    def delete(self, endpoint: str, token: Optional[str] = None, headers: Optional[Dict] = None) -> CachedJSONResponse:
         """Make DELETE request"""
         url = f"{self.base_url}{endpoint}"
         request_headers = self._get_headers(token, headers)
         response = self.session.delete(url, headers=request_headers)
-        return response
+        return self._cache_json(response)
     
-    def patch(self, endpoint: str, data: Optional[Dict] = None, token: Optional[str] = None, headers: Optional[Dict] = None) -> requests.Response:
+    def patch(self, endpoint: str, data: Optional[Dict] = None, token: Optional[str] = None, headers: Optional[Dict] = None) -> CachedJSONResponse:
         """Make PATCH request"""
         url = f"{self.base_url}{endpoint}"
         request_headers = self._get_headers(token, headers)
-        response = self.session.patch(url, json=data, headers=request_headers)
-        return response
+        response = self.session.patch(url, data=self._encode(data), headers=request_headers)
+        return self._cache_json(response)
     
-    def assert_status_code(self, response: requests.Response, expected_status: int, message: Optional[str] = None):
+    @staticmethod
+    def _encode(data: Optional[Dict]) -> Optional[bytes]:
+        """Serialize a request body with orjson (Content-Type is a default header)"""
+        return orjson.dumps(data) if data is not None else None
+    
+    @staticmethod
+    def _cache_json(response: requests.Response) -> CachedJSONResponse:
+        """Wrap the response so repeated response.json() calls reuse the first parse"""
+        return CachedJSONResponse(response)
+    
+    @staticmethod
+    def assert_status_code(response: requests.Response, expected_status: int, message: Optional[str] = None):
         """Assert response status code"""
+        # Compare first; the failure message (and response.text) is only built on failure
+        if response.status_code == expected_status:
+            return
         if message:
-            assert response.status_code == expected_status, f"{message}. Got {response.status_code}, expected {expected_status}. Response: {response.text}"
-        else:
-            assert response.status_code == expected_status, f"Expected {expected_status}, got {response.status_code}. Response: {response.text}"
+            raise AssertionError(f"{message}. Got {response.status_code}, expected {expected_status}. Response: {response.text[:500]}")
+        raise AssertionError(f"Expected {expected_status}, got {response.status_code}. Response: {response.text[:500]}")
     
-    def assert_response_contains(self, response: requests.Response, key: str, value: Any = None):
+    @staticmethod
+    def assert_response_contains(response: requests.Response, key: str, value: Any = None):
         """Assert response JSON contains key and optionally a specific value"""
         json_data = response.json()
-        assert key in json_data, f"Key '{key}' not found in response: {json_data}"
+        if key not in json_data:
+            raise AssertionError(f"Key '{key}' not found in response: {json_data}")
         
-        if value is not None:
-            assert json_data[key] == value, f"Expected {key}={value}, got {json_data[key]}"
+        if value is not None and json_data[key] != value:
+            raise AssertionError(f"Expected {key}={value}, got {json_data[key]}")
     
-    def assert_response_schema(self, response: requests.Response, schema: Dict):
-        """Assert response JSON matches expected schema"""
+    @staticmethod
+    def assert_response_schema(response: requests.Response, schema: Dict):
+        """Assert response JSON has every schema key, each of the expected type"""
         json_data = response.json()
-        
-        for key, expected_type in schema.items():
-            assert key in json_data, f"Key '{key}' not found in response"
-            assert isinstance(json_data[key], expected_type), f"Key '{key}' expected type {expected_type}, got {type(json_data[key])}"
\ No newline at end of file
+        # Superset check on the key views first; the diagnostics are only built on failure
+        if json_data.keys() >= schema.keys() and all(
+            isinstance(json_data[key], expected_type) for key, expected_type in schema.items()
+        ):
+            return
+        missing = schema.keys() - json_data.keys()
+        mistyped = {
+            key: type(json_data[key]).__name__
+            for key, expected_type in schema.items()
+            if key in json_data and not isinstance(json_data[key], expected_type)
+        }
+        raise AssertionError(f"Response does not match schema. Missing: {sorted(missing)}, wrong type: {mistyped}")
+    
+    @staticmethod
+    def assert_json_response(response: requests.Response, expected_status: int, schema: Dict) -> Dict:
+        """Assert status code and schema, then return the (already decoded) JSON body"""
+        BaseAPI.assert_status_code(response, expected_status)
+        BaseAPI.assert_response_schema(response, schema)
+        return response.json()
@@ -0,0 +1,84 @@
+"""Canned-response transport for running page objects without a live API"""
+import orjson
+import re
+import uuid
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+MOCK_BASE_URL = "http://mock-api/api"
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+PUBLIC_ENDPOINTS = {"/", "/health", "/auth/register", "/auth/login"}
+
+class MockAPIAdapter(BaseAdapter):
+    """requests adapter answering like the API would for stateless checks
+    
+    The mock knows no users, so every bearer token is rejected. It covers
+    request validation and authentication failures only; anything that needs
+    stored state must run against the live server.
+    """
+    
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        path = urlparse(request.url).path
+        prefix = urlparse(MOCK_BASE_URL).path
+        if path.startswith(prefix):
+            path = path[len(prefix):] or "/"
+        
+        body = orjson.loads(request.body) if request.body else {}
+        status_code, payload, headers = self._respond(request.method, path, body, request.headers)
+        
+        response = Response()
+        response.status_code = status_code
+        response._content = orjson.dumps(payload)
+        response.headers["Content-Type"] = "application/json"
+        response.headers.update(headers)
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+    
+    def close(self):
+        pass
+    
+    def _respond(self, method: str, path: str, body: Dict, headers) -> Tuple[int, object, Dict]:
+        if path not in PUBLIC_ENDPOINTS:
+            if not headers.get("Authorization", "").startswith("Bearer "):
+                return 403, {"detail": "Not authenticated"}, {}
+            return 401, {"detail": "Could not validate credentials"}, {"WWW-Authenticate": "Bearer"}
+        
+        if path == "/health":
+            return 200, {"status": "healthy"}, {}
+        if path == "/":
+            return 200, {"message": "API Security Validation Framework", "version": "1.0.0"}, {}
+        
+        if path == "/auth/register":
+            error = _validation_error(body, ("email", "username", "password"))
+            if error is None and len(body["password"]) < 6:
+                error = _field_error("password", "Password must be at least 6 characters")
+            if error is None and len(body["username"]) < 3:
+                error = _field_error("username", "Username must be at least 3 characters")
+            if error is not None:
+                return 422, error, {}
+            return 201, {"message": "User created successfully", "user_id": uuid.uuid4().hex}, {}
+        
+        # /auth/login
+        error = _validation_error(body, ("email", "password"))
+        if error is not None:
+            return 422, error, {}
+        return 401, {"detail": "Incorrect email or password"}, {}
+
+def _field_error(field: str, message: str) -> Dict:
+    return {"detail": [{"loc": ["body", field], "msg": message, "type": "value_error"}]}
+
+def _validation_error(body: Dict, required: Tuple[str, ...]) -> Optional[Dict]:
+    """Mirror the API's 422 for missing fields and malformed emails"""
+    for field in required:
+        if field not in body:
+            return {"detail": [{"loc": ["body", field], "msg": "Field required", "type": "missing"}]}
+    if not EMAIL_PATTERN.match(str(body["email"])):
+        return _field_error("email", "value is not a valid email address")
+    return None
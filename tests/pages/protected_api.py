@@ -56,4 +56,9 @@ class ProtectedAPI(BaseAPI):
     
     def root(self):
         """Root endpoint (public with rate limit)"""
-        return self.get("/")
\ No newline at end of file
+        return self.get("/")
+    
+    # Test support (only exposed when the server runs with TEST_MODE=1)
+    def reset_rate_limits(self):
+        """Clear every rate-limit counter on the server"""
+        return self.post("/test/reset-rate-limits")
@@ -1,15 +1,14 @@
 """Authentication tests for API security validation"""
 import pytest
-import time
-from tests.pages.auth_api import AuthAPI
 
 @pytest.mark.auth
 class TestAuthentication:
     """Test suite for authentication functionality"""
     
-    def test_successful_registration(self, api_base_url, test_user_credentials):
+    @pytest.mark.needs_db
+    @pytest.mark.live
+    def test_successful_registration(self, auth_api, test_user_credentials):
         """Test successful user registration"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.register_response(
             test_user_credentials["email"],
             test_user_credentials["username"],
@@ -21,10 +20,11 @@ class TestAuthentication:
         auth_api.assert_response_contains(response, "message")
         auth_api.assert_response_contains(response, "user_id")
     
-    def test_duplicate_email_registration(self, api_base_url, test_user_credentials):
+    @pytest.mark.db_mutate
+    @pytest.mark.needs_db
+    @pytest.mark.live
+    def test_duplicate_email_registration(self, auth_api, test_user_credentials):
         """Test registration with duplicate email fails"""
-        auth_api = AuthAPI(api_base_url)
-        
         # First registration
         auth_api.register_response(
             test_user_credentials["email"],
@@ -41,9 +41,8 @@ class TestAuthentication:
         
         auth_api.assert_status_code(response, 400, "Duplicate email should be rejected")
     
-    def test_invalid_password_length(self, api_base_url, test_user_credentials):
+    def test_invalid_password_length(self, auth_api, test_user_credentials):
         """Test registration with short password fails"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.register_response(
             test_user_credentials["email"],
             test_user_credentials["username"],
@@ -52,20 +51,19 @@ class TestAuthentication:
         
         auth_api.assert_status_code(response, 422, "Short password should be rejected")
     
-    def test_invalid_username_length(self, api_base_url):
+    def test_invalid_username_length(self, auth_api, unique_prefix):
         """Test registration with short username fails"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.register_response(
-            f"test_{int(time.time())}@example.com",
+            f"test_{unique_prefix}@example.com",
             "ab",  # Too short
             "password123"
         )
         
         auth_api.assert_status_code(response, 422, "Short username should be rejected")
     
-    def test_successful_login(self, api_base_url, registered_user):
+    @pytest.mark.smoke
+    def test_successful_login(self, auth_api, registered_user):
         """Test successful login with valid credentials"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.login_response(
             registered_user["email"],
             registered_user["password"]
@@ -79,9 +77,8 @@ class TestAuthentication:
         assert data["role"] == registered_user["role"]
         assert "access_token" in data
     
-    def test_login_with_wrong_password(self, api_base_url, registered_user):
+    def test_login_with_wrong_password(self, auth_api, registered_user):
         """Test login with incorrect password fails"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.login_response(
             registered_user["email"],
             "wrongpassword123"
@@ -89,9 +86,8 @@ class TestAuthentication:
         
         auth_api.assert_status_code(response, 401, "Wrong password should be rejected")
     
-    def test_login_with_nonexistent_email(self, api_base_url):
+    def test_login_with_nonexistent_email(self, auth_api):
         """Test login with non-existent email fails"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.login_response(
             "nonexistent@example.com",
             "password123"
@@ -99,32 +95,29 @@ class TestAuthentication:
         
         auth_api.assert_status_code(response, 401, "Non-existent user should be rejected")
     
-    def test_access_protected_endpoint_without_token(self, api_base_url):
+    def test_access_protected_endpoint_without_token(self, auth_api):
         """Test accessing protected endpoint without token fails"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.get("/me")
         
         auth_api.assert_status_code(response, 403, "Missing token should be rejected")
     
-    def test_access_protected_endpoint_with_invalid_token(self, api_base_url):
+    def test_access_protected_endpoint_with_invalid_token(self, auth_api):
         """Test accessing protected endpoint with invalid token fails"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.get("/me", token="invalid.token.here")
         
         auth_api.assert_status_code(response, 401, "Invalid token should be rejected")
     
-    def test_access_protected_endpoint_with_valid_token(self, api_base_url, registered_user):
+    @pytest.mark.smoke
+    def test_access_protected_endpoint_with_valid_token(self, auth_api, registered_user):
         """Test accessing protected endpoint with valid token succeeds"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.get_current_user(registered_user["token"])
         
         auth_api.assert_status_code(response, 200, "Valid token should grant access")
         auth_api.assert_response_contains(response, "email", registered_user["email"])
         auth_api.assert_response_contains(response, "role", registered_user["role"])
     
-    def test_token_contains_correct_user_info(self, api_base_url, registered_user):
+    def test_token_contains_correct_user_info(self, auth_api, registered_user):
         """Test that token contains correct user information"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.get_current_user(registered_user["token"])
         
         data = response.json()
@@ -1,148 +1,152 @@
 """Schema validation tests for API security validation"""
 import pytest
-import time
-from tests.pages.auth_api import AuthAPI
-from tests.pages.protected_api import ProtectedAPI
+from typing import Dict, NamedTuple
+from tests.helpers import burst
+
+class NegativeCase(NamedTuple):
+    """A payload the API must reject with 422"""
+    id: str
+    path: str
+    payload: Dict
+    message: str
+
+# Register/login payloads, sent without a token
+AUTH_NEGATIVE_CASES = [
+    NegativeCase("register_missing_password", "/auth/register", {
+        "email": "test@example.com",
+        "username": "testuser"
+        # Missing password
+    }, "Missing required field should fail"),
+    NegativeCase("register_invalid_email", "/auth/register", {
+        "email": "not-an-email",  # Invalid email
+        "username": "testuser",
+        "password": "password123",
+        "role": "user"
+    }, "Invalid email format should fail"),
+    NegativeCase("login_missing_password", "/auth/login", {
+        "email": "test@example.com"
+        # Missing password
+    }, "Missing required field should fail"),
+]
+
+# Product payloads, POSTed with a valid token
+PRODUCT_NEGATIVE_CASES = [
+    NegativeCase("missing_fields", "/products", {
+        "name": "Test Product"
+        # Missing description and price
+    }, "Missing required fields should fail"),
+    NegativeCase("negative_price", "/products", {
+        "name": "Test Product",
+        "description": "Test Description",
+        "price": -10.99  # Negative price
+    }, "Negative price should fail validation"),
+    NegativeCase("short_name", "/products", {
+        "name": "ab",  # Too short
+        "description": "Test Description",
+        "price": 10.99
+    }, "Short name should fail validation"),
+]
+
+def _assert_all_rejected(cases, responses):
+    """Assert every response is a 422, listing each case that was not"""
+    failures = [
+        f"{case.id}: {case.message}. Got {response.status_code}. Response: {response.text[:200]}"
+        for case, response in zip(cases, responses)
+        if response.status_code != 422
+    ]
+    if failures:
+        raise AssertionError("\n".join(failures))
+
+# Expected response bodies: field -> accepted type(s)
+PRODUCT_SCHEMA = {
+    "id": str,
+    "name": str,
+    "description": str,
+    "price": (int, float),
+    "created_by": str,
+    "created_at": str,
+}
+LOGIN_SCHEMA = {
+    "access_token": str,
+    "token_type": str,
+    "expires_in": int,
+    "user_id": str,
+    "role": str,
+    "scopes": list,
+}
+USER_INFO_SCHEMA = {
+    "id": str,
+    "email": str,
+    "username": str,
+    "role": str,
+    "scopes": list,
+}
 
 @pytest.mark.schema
 class TestSchemaValidation:
     """Test suite for request/response schema validation"""
     
-    def test_register_missing_required_fields(self, api_base_url):
-        """Test registration with missing required fields fails"""
-        auth_api = AuthAPI(api_base_url)
-        
-        # Missing password
-        response = auth_api.post("/auth/register", data={
-            "email": "test@example.com",
-            "username": "testuser"
-        })
-        
-        auth_api.assert_status_code(response, 422, "Missing required field should fail")
-    
-    def test_register_invalid_email_format(self, api_base_url):
-        """Test registration with invalid email format fails"""
-        auth_api = AuthAPI(api_base_url)
-        response = auth_api.register_response(
-            "not-an-email",  # Invalid email
-            "testuser",
-            "password123"
+    def test_auth_invalid_payloads_rejected(self, auth_api):
+        """Test registration and login with invalid payloads fail"""
+        # The cases share no state, so all requests go out at once
+        responses = burst(
+            lambda i: auth_api.post(AUTH_NEGATIVE_CASES[i].path, data=AUTH_NEGATIVE_CASES[i].payload),
+            len(AUTH_NEGATIVE_CASES)
         )
         
-        auth_api.assert_status_code(response, 422, "Invalid email format should fail")
-    
-    def test_login_missing_required_fields(self, api_base_url):
-        """Test login with missing required fields fails"""
-        auth_api = AuthAPI(api_base_url)
-        response = auth_api.post("/auth/login", data={
-            "email": "test@example.com"
-            # Missing password
-        })
-        
-        auth_api.assert_status_code(response, 422, "Missing required field should fail")
-    
-    def test_product_creation_missing_fields(self, api_base_url, registered_user):
-        """Test product creation with missing required fields fails"""
-        api = ProtectedAPI(api_base_url)
-        response = api.post("/products", data={
-            "name": "Test Product"
-            # Missing description and price
-        }, token=registered_user["token"])
-        
-        api.assert_status_code(response, 422, "Missing required fields should fail")
+        _assert_all_rejected(AUTH_NEGATIVE_CASES, responses)
     
-    def test_product_creation_invalid_price(self, api_base_url, registered_user):
-        """Test product creation with invalid price fails"""
-        api = ProtectedAPI(api_base_url)
-        response = api.post("/products", data={
-            "name": "Test Product",
-            "description": "Test Description",
-            "price": -10.99  # Negative price
-        }, token=registered_user["token"])
-        
-        api.assert_status_code(response, 422, "Negative price should fail validation")
-    
-    def test_product_creation_invalid_name_length(self, api_base_url, registered_user):
-        """Test product creation with too short name fails"""
-        api = ProtectedAPI(api_base_url)
-        response = api.post("/products", data={
-            "name": "ab",  # Too short
-            "description": "Test Description",
-            "price": 10.99
-        }, token=registered_user["token"])
+    def test_product_invalid_payloads_rejected(self, protected_api, auth_token):
+        """Test product creation with invalid payloads fails"""
+        responses = burst(
+            lambda i: protected_api.post(
+                PRODUCT_NEGATIVE_CASES[i].path, data=PRODUCT_NEGATIVE_CASES[i].payload, token=auth_token
+            ),
+            len(PRODUCT_NEGATIVE_CASES)
+        )
         
-        api.assert_status_code(response, 422, "Short name should fail validation")
+        _assert_all_rejected(PRODUCT_NEGATIVE_CASES, responses)
     
-    def test_product_response_schema(self, api_base_url, registered_user, test_product_data):
+    def test_product_response_schema(self, protected_api, auth_token, test_product_data):
         """Test product response has correct schema"""
-        api = ProtectedAPI(api_base_url)
-        response = api.create_product(
-            registered_user["token"],
+        response = protected_api.create_product(
+            auth_token,
             test_product_data["name"],
             test_product_data["description"],
             test_product_data["price"]
         )
         
-        api.assert_status_code(response, 201)
-        
-        # Validate response schema
-        data = response.json()
-        required_fields = ["id", "name", "description", "price", "created_by", "created_at"]
-        
-        for field in required_fields:
-            assert field in data, f"Response should contain {field}"
-        
-        assert isinstance(data["id"], str)
-        assert isinstance(data["name"], str)
-        assert isinstance(data["price"], (int, float))
+        # Validate status and response schema
+        protected_api.assert_json_response(response, 201, PRODUCT_SCHEMA)
     
-    def test_login_response_schema(self, api_base_url, registered_user):
+    @pytest.mark.smoke
+    def test_login_response_schema(self, auth_api, registered_user):
         """Test login response has correct schema"""
-        auth_api = AuthAPI(api_base_url)
         response = auth_api.login_response(
             registered_user["email"],
             registered_user["password"]
         )
         
-        auth_api.assert_status_code(response, 200)
-        
-        # Validate response schema
-        data = response.json()
-        required_fields = ["access_token", "token_type", "expires_in", "user_id", "role", "scopes"]
-        
-        for field in required_fields:
-            assert field in data, f"Response should contain {field}"
-        
+        # Validate status and response schema
+        data = auth_api.assert_json_response(response, 200, LOGIN_SCHEMA)
         assert data["token_type"] == "bearer"
-        assert isinstance(data["expires_in"], int)
-        assert isinstance(data["scopes"], list)
     
-    def test_user_info_response_schema(self, api_base_url, registered_user):
+    @pytest.mark.smoke
+    def test_user_info_response_schema(self, auth_api, auth_token):
         """Test user info response has correct schema"""
-        auth_api = AuthAPI(api_base_url)
-        response = auth_api.get_current_user(registered_user["token"])
-        
-        auth_api.assert_status_code(response, 200)
-        
-        # Validate response schema
-        data = response.json()
-        required_fields = ["id", "email", "username", "role", "scopes"]
-        
-        for field in required_fields:
-            assert field in data, f"Response should contain {field}"
+        response = auth_api.get_current_user(auth_token)
         
-        assert isinstance(data["scopes"], list)
+        # Validate status and response schema
+        auth_api.assert_json_response(response, 200, USER_INFO_SCHEMA)
     
-    def test_product_creation_extra_fields_ignored(self, api_base_url, registered_user):
+    def test_product_creation_extra_fields_ignored(self, protected_api, auth_token):
         """Test that extra fields in product creation are handled properly"""
-        api = ProtectedAPI(api_base_url)
-        response = api.post("/products", data={
+        response = protected_api.post("/products", data={
             "name": "Test Product",
             "description": "Test Description",
             "price": 99.99,
             "extra_field": "This should be ignored"
-        }, token=registered_user["token"])
+        }, token=auth_token)
         
         # Should succeed, extra fields ignored
-        auth_api = AuthAPI(api_base_url)
-        auth_api.assert_status_code(response, 201, "Extra fields should be ignored")
\ No newline at end of file
+        protected_api.assert_status_code(response, 201, "Extra fields should be ignored")
\ No newline at end of file